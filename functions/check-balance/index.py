@@ -5,13 +5,13 @@ Se invoca directamente desde Amazon Connect (no desde Lex)
 """
 
 import json
-import os
-import boto3
-
-dynamodb = boto3.resource('dynamodb')
-customers_table = dynamodb.Table(os.environ['CUSTOMERS_TABLE'])
+from rate_limiter import is_throttled, THROTTLED_MESSAGE
+from profiling import profile_handler
+from venues import resolve_venue_from_connect
+from customers import get_customer
 
 
+@profile_handler
 def handler(event, context):
     """
     Handler para consultar balance
@@ -21,6 +21,11 @@ def handler(event, context):
         "Details": {
             "Parameters": {
                 "customer_dni": "12345678"
+            },
+            "ContactData": {
+                "Attributes": {
+                    "venue_id": "central"
+                }
             }
         }
     }
@@ -31,17 +36,29 @@ def handler(event, context):
         # Extraer DNI del evento de Connect
         customer_dni = event['Details']['Parameters']['customer_dni']
         
-        print(f"Consultando saldo para DNI: {customer_dni}")
+        contact_id = event['Details'].get('ContactData', {}).get('ContactId')
+        
+        # Rate limit por DNI y por contacto, antes de tocar la tabla
+        if is_throttled(customer_dni, contact_id):
+            # Sin balance: el flujo debe ramificar por found = 'throttled'
+            result = {
+                'found': 'throttled',
+                'message': THROTTLED_MESSAGE
+            }
+            print(f"Solicitud limitada: {json.dumps(result)}")
+            return result
+        
+        venue_id = resolve_venue_from_connect(event)
+        
+        print(f"Consultando saldo para DNI: {customer_dni} en sede: {venue_id}")
         
-        # Buscar cliente en DynamoDB
-        response = customers_table.get_item(
-            Key={'customer_dni': customer_dni}
-        )
+        # Buscar cliente en DynamoDB (solo lectura: no migra desde la tabla anterior)
+        customer = get_customer(venue_id, customer_dni, migrate=False)
         
-        print(f"Respuesta de DynamoDB: {json.dumps(response, default=str)}")
+        print(f"Cliente en DynamoDB: {json.dumps(customer, default=str)}")
         
-        if 'Item' in response:
-            credits = int(response['Item'].get('credits', 0))
+        if customer is not None:
+            credits = int(customer.get('credits', 0))
             
             result = {
                 'balance': str(credits),
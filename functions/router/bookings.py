@@ -0,0 +1,265 @@
+"""
+Reservas con bloqueo de horario en transacciones
+Compartido por ReserveCourtIntent y RecurringReservationIntent
+"""
+
+import os
+from time import sleep
+import uuid
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from utils import get_current_timestamp_ba
+from venues import (
+    customer_key,
+    venue_day_key,
+    reservation_slot_key,
+    slot_lock_key,
+    build_slot_lock
+)
+from courts import court_numbers
+
+CUSTOMERS_TABLE = os.environ['CUSTOMERS_TABLE']
+RESERVATIONS_TABLE = os.environ['RESERVATIONS_TABLE']
+
+dynamodb = boto3.resource('dynamodb')
+client = dynamodb.meta.client
+serializer = TypeSerializer()
+
+# Límites de DynamoDB por operación
+MAX_BATCH_GET_KEYS = 100
+MAX_TRANSACTION_ITEMS = 100
+
+# Cada reserva usa 2 items (reserva + bloqueo) y cada transacción 1 débito
+MAX_RESERVATIONS_PER_TRANSACTION = (MAX_TRANSACTION_ITEMS - 1) // 2
+
+# Reintentos cuando una transacción se cancela por otra concurrente
+MAX_TRANSACTION_ATTEMPTS = 3
+
+# Reintentos de UnprocessedKeys (DynamoDB las devuelve cuando está limitando)
+MAX_BATCH_GET_ATTEMPTS = 5
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+
+customers_table = dynamodb.Table(CUSTOMERS_TABLE)
+
+
+def find_free_courts(venue_id, court_type, occurrences):
+    """
+    Busca qué canchas siguen libres en cada horario con un solo BatchGetItem
+
+    Args:
+        venue_id: Sede
+        court_type: Tipo de cancha canónico
+        occurrences: Lista de tuplas (fecha YYYY-MM-DD, hora HH:MM)
+
+    Returns:
+        dict: (fecha, hora) -> lista de números de cancha libres, en orden.
+              Lista vacía si todas las canchas del horario están ocupadas.
+
+    Raises:
+        RuntimeError: Si quedan claves sin procesar después de los reintentos
+    """
+    numbers = court_numbers(venue_id, court_type)
+    lock_keys = {
+        slot_lock_key(venue_id, date, time, court_type, number): ((date, time), number)
+        for date, time in occurrences
+        for number in numbers
+    }
+    taken = set()
+    pending = list(lock_keys)
+
+    while pending:
+        request = {
+            RESERVATIONS_TABLE: {
+                'Keys': [{'reservation_id': key} for key in pending[:MAX_BATCH_GET_KEYS]],
+                'ProjectionExpression': 'reservation_id'
+            }
+        }
+        pending = pending[MAX_BATCH_GET_KEYS:]
+
+        for attempt in range(MAX_BATCH_GET_ATTEMPTS):
+            if attempt:
+                # Backoff exponencial: 50 ms, 100 ms, 200 ms, ...
+                sleep(BATCH_GET_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(RESERVATIONS_TABLE, []):
+                taken.add(lock_keys[item['reservation_id']])
+
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+        else:
+            # Sin saber si están libres no se puede reservar con seguridad
+            raise RuntimeError('No se pudo verificar la disponibilidad: DynamoDB limitando lecturas')
+
+    return {
+        occurrence: [number for number in numbers if (occurrence, number) not in taken]
+        for occurrence in occurrences
+    }
+
+
+def build_reservation(venue_id, customer_dni, court_type, court_number, date, time, cost):
+    """Arma el item de una reserva confirmada"""
+    return {
+        'reservation_id': f"RES-{uuid.uuid4().hex[:8].upper()}",
+        'venue_id': venue_id,
+        'customer_key': customer_key(venue_id, customer_dni),
+        'customer_dni': customer_dni,
+        'venue_day': venue_day_key(venue_id, date),
+        'reservation_slot': reservation_slot_key(time, court_type, court_number),
+        'court_type': court_type,
+        'court_number': court_number,
+        'reservation_date': date,
+        'reservation_time': time,
+        'reservation_datetime': f"{date} {time}",
+        'cost': cost,
+        'status': 'confirmed',
+        'created_at': get_current_timestamp_ba()
+    }
+
+
+def _serialize(item):
+    """Convierte un item al formato low-level que pide TransactWriteItems"""
+    return {key: serializer.serialize(value) for key, value in item.items()}
+
+
+def _transaction_items(reservations, key, total_cost):
+    """
+    Items de la transacción: por cada reserva, la reserva y su bloqueo;
+    al final, el débito total de créditos
+    """
+    items = []
+    for reservation in reservations:
+        items.append({
+            'Put': {
+                'TableName': RESERVATIONS_TABLE,
+                'Item': _serialize(reservation)
+            }
+        })
+        items.append({
+            'Put': {
+                'TableName': RESERVATIONS_TABLE,
+                'Item': _serialize(build_slot_lock(reservation)),
+                'ConditionExpression': 'attribute_not_exists(reservation_id)'
+            }
+        })
+
+    items.append({
+        'Update': {
+            'TableName': CUSTOMERS_TABLE,
+            'Key': _serialize({'customer_key': key}),
+            'UpdateExpression': 'SET credits = credits - :total',
+            'ConditionExpression': 'credits >= :total',
+            'ExpressionAttributeValues': _serialize({':total': total_cost})
+        }
+    })
+    return items
+
+
+def book_reservations(venue_id, customer_dni, court_type, occurrences, cost, free_courts=None):
+    """
+    Reserva los horarios y descuenta los créditos en transacciones por bloques
+
+    Cada horario toma la primera cancha libre. Cada bloque es atómico: si
+    una cancha se ocupó entre la lectura y la escritura, ese horario pasa a
+    la siguiente cancha libre y se reintenta el bloque; cuando no quedan
+    canchas, el horario sale del bloque como conflicto.
+
+    Args:
+        venue_id: Sede
+        customer_dni: DNI del cliente
+        court_type: Tipo de cancha canónico
+        occurrences: Lista de tuplas (fecha YYYY-MM-DD, hora HH:MM)
+        cost: Costo de cada reserva en créditos
+        free_courts: Resultado de find_free_courts; por defecto se prueban
+                     todas las canchas de la sede
+
+    Returns:
+        tuple: (reservas creadas, tuplas (fecha, hora) en conflicto).
+               Si los créditos no alcanzan se corta y el resto queda sin reservar.
+    """
+    key = customer_key(venue_id, customer_dni)
+    booked = []
+    conflicts = []
+
+    if free_courts is None:
+        free_courts = {
+            occurrence: court_numbers(venue_id, court_type)
+            for occurrence in occurrences
+        }
+    candidates = {occurrence: list(free_courts.get(occurrence, [])) for occurrence in occurrences}
+
+    conflicts.extend(occurrence for occurrence in occurrences if not candidates[occurrence])
+    available = [occurrence for occurrence in occurrences if candidates[occurrence]]
+
+    for start in range(0, len(available), MAX_RESERVATIONS_PER_TRANSACTION):
+        chunk = available[start:start + MAX_RESERVATIONS_PER_TRANSACTION]
+        attempts = 0
+
+        while chunk:
+            reservations = [
+                build_reservation(
+                    venue_id, customer_dni, court_type,
+                    candidates[(date, time)][0], date, time, cost
+                )
+                for date, time in chunk
+            ]
+
+            try:
+                client.transact_write_items(
+                    TransactItems=_transaction_items(reservations, key, cost * len(chunk))
+                )
+                booked.extend(reservations)
+                break
+
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+
+                reasons = [
+                    reason.get('Code')
+                    for reason in e.response.get('CancellationReasons', [])
+                ]
+                print(f"⚠️ Transacción cancelada: {reasons}")
+
+                # El bloqueo de la reserva i está en la posición 2 * i + 1.
+                # Primero se resuelven las canchas ocupadas y se reintenta el
+                # bloque: el débito pudo fallar solo porque incluía esas reservas.
+                taken = [
+                    occurrence for i, occurrence in enumerate(chunk)
+                    if len(reasons) > 2 * i + 1 and reasons[2 * i + 1] == 'ConditionalCheckFailed'
+                ]
+
+                if taken:
+                    for occurrence in taken:
+                        candidates[occurrence].pop(0)
+                        if not candidates[occurrence]:
+                            conflicts.append(occurrence)
+                    chunk = [occurrence for occurrence in chunk if candidates[occurrence]]
+                    continue
+
+                # Solo falló el débito (el último item): no alcanzan los créditos
+                if len(reasons) == 2 * len(chunk) + 1 and reasons[-1] == 'ConditionalCheckFailed':
+                    print("❌ Créditos insuficientes al debitar")
+                    return booked, conflicts
+
+                attempts += 1
+                if attempts >= MAX_TRANSACTION_ATTEMPTS:
+                    raise
+
+    return booked, conflicts
+
+
+def get_credits(venue_id, customer_dni):
+    """
+    Lee el saldo después de reservar
+
+    TransactWriteItems no devuelve valores, así que se hace una lectura
+    consistente para no informar un saldo viejo si hubo otra operación.
+    """
+    response = customers_table.get_item(
+        Key={'customer_key': customer_key(venue_id, customer_dni)},
+        ConsistentRead=True
+    )
+    return int(response.get('Item', {}).get('credits', 0))
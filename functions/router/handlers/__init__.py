@@ -4,5 +4,6 @@ Handlers package
 
 from .load_credits import handle_load_credits
 from .reserve_court import handle_reserve_court
+from .recurring_reservation import handle_recurring_reservation
 
-__all__ = ['handle_load_credits', 'handle_reserve_court']
\ No newline at end of file
+__all__ = ['handle_load_credits', 'handle_reserve_court', 'handle_recurring_reservation']
\ No newline at end of file
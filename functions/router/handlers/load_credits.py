@@ -12,6 +12,8 @@ from utils import (
     elicit_slot,
     delegate
 )
+from venues import resolve_venue_from_lex, customer_key
+from customers import get_customer
 
 dynamodb = boto3.resource('dynamodb')
 customers_table = dynamodb.Table(os.environ['CUSTOMERS_TABLE'])
@@ -73,6 +75,7 @@ def handle_load_credits(event):
     invocation_source = event['invocationSource']
     slots = event['sessionState']['intent']['slots']
     session_attributes = event.get('sessionState', {}).get('sessionAttributes', {})
+    venue_id = resolve_venue_from_lex(event)
     
     # Extraer valores de los slots
     amount = get_slot_value(slots, 'sl_amount')
@@ -82,7 +85,7 @@ def handle_load_credits(event):
     
     print(f"🔍 invocationSource: {invocation_source}")
     print(f"📋 Session Attributes: {session_attributes}")
-    print(f"📋 Slots - Monto: {amount}, DNI: {customer_dni}, Método: {payment_method}")
+    print(f"📋 Slots - Sede: {venue_id}, Monto: {amount}, DNI: {customer_dni}, Método: {payment_method}")
     
     # ==========================================
     # PASO 0: Pre-llenar monto si no existe
@@ -128,23 +131,25 @@ def handle_load_credits(event):
         
         try:
             amount = int(amount)
+            key = customer_key(venue_id, customer_dni)
             
             # Buscar o crear cliente
-            response = customers_table.get_item(Key={'customer_dni': customer_dni})
+            customer = get_customer(venue_id, customer_dni)
             
-            if 'Item' in response:
-                # Cliente existe - actualizar créditos
-                current_credits = int(response['Item'].get('credits', 0))
-                new_credits = current_credits + amount
-                
-                customers_table.update_item(
-                    Key={'customer_dni': customer_dni},
-                    UpdateExpression='SET credits = :credits, last_load = :timestamp',
+            if customer is not None:
+                # Cliente existe - sumar créditos de forma atómica (una
+                # reserva concurrente puede haber debitado desde la lectura)
+                response = customers_table.update_item(
+                    Key={'customer_key': key},
+                    UpdateExpression='SET credits = credits + :amount, last_load = :timestamp',
                     ExpressionAttributeValues={
-                        ':credits': new_credits,
+                        ':amount': amount,
                         ':timestamp': get_current_timestamp_ba()
-                    }
+                    },
+                    ReturnValues='UPDATED_NEW'
                 )
+                new_credits = int(response['Attributes']['credits'])
+                current_credits = new_credits - amount
                 
                 message = (
                     f'✅ ¡Carga exitosa!\n\n'
@@ -162,11 +167,14 @@ def handle_load_credits(event):
                 # Cliente nuevo - crear registro
                 customers_table.put_item(
                     Item={
+                        'customer_key': key,
+                        'venue_id': venue_id,
                         'customer_dni': customer_dni,
                         'credits': amount,
                         'created_at': get_current_timestamp_ba(),
                         'last_load': get_current_timestamp_ba()
-                    }
+                    },
+                    ConditionExpression='attribute_not_exists(customer_key)'
                 )
                 
                 message = (
@@ -0,0 +1,307 @@
+"""
+Handler para RecurringReservationIntent
+Reserva el mismo día y hora durante varias semanas en una sola conversación
+"""
+
+import re
+from datetime import datetime, timedelta
+from utils import (
+    get_slot_value,
+    close_intent,
+    validate_reservation_time,
+    format_date,
+    get_current_time_ba,
+    elicit_slot,
+    delegate
+)
+from venues import resolve_venue_from_lex
+from customers import get_customer
+from bookings import find_free_courts, book_reservations, get_credits
+from courts import COURT_COSTS, extract_court_type, normalize_reservation_time
+from .reserve_court import set_slot
+
+# Máximo de semanas por pedido
+MAX_RECURRING_WEEKS = 12
+
+# En plural, para "todos los ..."
+WEEKDAYS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábados', 'domingos']
+
+
+def extract_weeks(text):
+    """
+    Extrae la cantidad de semanas del mensaje del usuario
+
+    Ejemplos:
+    - "todos los martes a las 20 por 8 semanas" -> 8
+    - "durante 4 semanas" -> 4
+    - "todos los martes" -> None
+    """
+    if not text:
+        return None
+
+    match = re.search(r'(\d+)\s*semanas?', text.lower())
+    if match:
+        weeks = int(match.group(1))
+        print(f"✅ Detectadas semanas: {weeks} en '{text}'")
+        return weeks
+
+    print(f"❌ No se detectaron semanas en: '{text}'")
+    return None
+
+
+def expand_occurrences(date_str, time_str, weeks):
+    """
+    Expande la primera fecha en una reserva por semana
+
+    Returns:
+        list: Tuplas (fecha YYYY-MM-DD, hora HH:MM)
+    """
+    first = datetime.strptime(date_str, '%Y-%m-%d')
+    return [
+        ((first + timedelta(weeks=week)).strftime('%Y-%m-%d'), time_str)
+        for week in range(weeks)
+    ]
+
+
+def handle_recurring_reservation(event):
+    """
+    Maneja el intent de reserva recurrente semanal
+    """
+    invocation_source = event['invocationSource']
+    slots = event['sessionState']['intent']['slots']
+    session_attributes = event.get('sessionState', {}).get('sessionAttributes', {})
+    venue_id = resolve_venue_from_lex(event)
+
+    # Extraer valores de los slots
+    customer_dni = get_slot_value(slots, 'sl_customer_dni')
+    court_type = get_slot_value(slots, 'slt_court_types')
+    date = get_slot_value(slots, 'sl_date')
+    time = get_slot_value(slots, 'sl_time')
+    weeks = get_slot_value(slots, 'sl_weeks')
+    confirmation = get_slot_value(slots, 'sl_confirmation', '')
+
+    print(f"🔍 invocationSource: {invocation_source}")
+    print(f"📋 Session Attributes: {session_attributes}")
+    print(f"📋 Slots - Sede: {venue_id}, DNI: {customer_dni}, Cancha: {court_type}, "
+          f"Desde: {date}, Hora: {time}, Semanas: {weeks}")
+
+    # ==========================================
+    # PASO 0: Pre-llenar cancha y semanas si no existen
+    # ==========================================
+    user_message = session_attributes.get('UserOriginalMessage', '')
+    input_transcript = event.get('inputTranscript', '')
+
+    if not court_type:
+        detected = extract_court_type(user_message) or extract_court_type(input_transcript)
+        if detected:
+            print(f"✅ Pre-llenando slot con: {detected}")
+            set_slot(slots, 'slt_court_types', detected)
+            court_type = detected
+
+    if not weeks:
+        detected = extract_weeks(user_message) or extract_weeks(input_transcript)
+        if detected:
+            print(f"✅ Pre-llenando slot con semanas: {detected}")
+            set_slot(slots, 'sl_weeks', str(detected))
+            weeks = str(detected)
+
+    # ==========================================
+    # PARTE 1: VALIDACIONES (DialogCodeHook)
+    # ==========================================
+    if invocation_source == 'DialogCodeHook':
+        print("✅ Validando slots...")
+
+        # Validación 1: Usuario canceló
+        if confirmation and confirmation.lower().strip() in ['no', 'nop', 'negativo', 'cancelar', 'cancelo', 'nunca', 'no quiero']:
+            print("❌ Usuario canceló")
+            return close_intent(
+                event,
+                'Fulfilled',
+                'Entendido, reserva cancelada. ¿En qué más puedo ayudarte?'
+            )
+
+        # Validación 2: Cantidad de semanas
+        if weeks and not (weeks.isdigit() and 1 <= int(weeks) <= MAX_RECURRING_WEEKS):
+            print(f"❌ Semanas fuera de rango: {weeks}")
+            slots['sl_weeks'] = None
+            return elicit_slot(
+                event,
+                'sl_weeks',
+                f'❌ Puedes reservar entre 1 y {MAX_RECURRING_WEEKS} semanas.\n'
+                f'¿Por cuántas semanas quieres reservar?'
+            )
+
+        # Validación 3: Tipo de cancha (se guarda el nombre canónico)
+        if court_type:
+            canonical_court = extract_court_type(court_type)
+            if canonical_court is None:
+                print(f"❌ Tipo de cancha desconocido: {court_type}")
+                slots['slt_court_types'] = None
+                return elicit_slot(
+                    event,
+                    'slt_court_types',
+                    f'❌ No tenemos canchas de {court_type}.\n'
+                    f'¿Qué cancha quieres reservar? Fútbol o vóley'
+                )
+            if canonical_court != court_type:
+                set_slot(slots, 'slt_court_types', canonical_court)
+                court_type = canonical_court
+
+        # Validación 4: Turnos de hora completa
+        if time:
+            normalized_time = normalize_reservation_time(time)
+            if normalized_time is None:
+                print(f"❌ Hora fuera de turno: {time}")
+                slots['sl_time'] = None
+                return elicit_slot(
+                    event,
+                    'sl_time',
+                    f'❌ Las canchas se reservan por hora completa y {time} no es un turno válido.\n'
+                    f'¿A qué hora quieres reservar? Ejemplo: 20:00'
+                )
+            if normalized_time != time:
+                set_slot(slots, 'sl_time', normalized_time)
+                time = normalized_time
+
+        # Validación 5: Primera fecha/hora en el pasado
+        if date and time:
+            if not validate_reservation_time(date, time):
+                print("❌ Fecha/hora en el pasado")
+                now_ba = get_current_time_ba()
+                slots['sl_date'] = None
+                slots['sl_time'] = None
+                return elicit_slot(
+                    event,
+                    'sl_date',
+                    f'❌ Ese horario ({format_date(date)} a las {time}) ya pasó.\n'
+                    f'Hora actual: {now_ba.strftime("%d/%m/%Y %H:%M")}\n\n'
+                    f'¿Desde qué fecha quieres reservar? Ejemplo: el próximo martes'
+                )
+
+        # Todo OK, continuar
+        return delegate(event)
+
+    # ==========================================
+    # PARTE 2: FULFILLMENT (crear reservas)
+    # ==========================================
+    if invocation_source == 'FulfillmentCodeHook':
+        print("✅ Creando reservas recurrentes...")
+
+        # El costo y el bloqueo de horario usan el tipo canónico
+        court_type = extract_court_type(court_type)
+        if court_type is None:
+            return close_intent(
+                event,
+                'Failed',
+                'No reconocimos el tipo de cancha. Intenta de nuevo con fútbol o vóley.'
+            )
+
+        # El bloqueo de horario necesita la hora del turno exacta
+        time = normalize_reservation_time(time)
+        if time is None:
+            return close_intent(
+                event,
+                'Failed',
+                'Las canchas se reservan por hora completa. Intenta de nuevo con un horario como 20:00.'
+            )
+
+        try:
+            # 1. Verificar cliente existe
+            customer = get_customer(venue_id, customer_dni)
+            if customer is None:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ No encontramos cuenta con DNI {customer_dni}.\n'
+                    f'Primero carga créditos: "quiero cargar créditos"'
+                )
+
+            current_credits = int(customer.get('credits', 0))
+            cost = COURT_COSTS[court_type]
+
+            # 2. Expandir fechas y revisar canchas libres en una sola lectura
+            occurrences = expand_occurrences(date, time, int(weeks))
+            free_courts = find_free_courts(venue_id, court_type, occurrences)
+            free = [occurrence for occurrence in occurrences if free_courts[occurrence]]
+            taken = {occurrence for occurrence in occurrences if not free_courts[occurrence]}
+
+            weekday = WEEKDAYS[datetime.strptime(date, '%Y-%m-%d').weekday()]
+            if not free:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ Las canchas de {court_type} ya están reservadas todos los '
+                    f'{weekday} a las {time} en esas {len(occurrences)} semanas.\n'
+                    f'Por favor elige otro día u horario.'
+                )
+
+            # 3. Verificar créditos para todas las fechas libres
+            total_cost = cost * len(free)
+            if current_credits < total_cost:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ Créditos insuficientes.\n'
+                    f'Necesitas: {total_cost} créditos ({len(free)} reservas de {cost})\n'
+                    f'Tienes: {current_credits} créditos\n'
+                    f'Faltan: {total_cost - current_credits} créditos\n\n'
+                    f'Carga más: "quiero cargar créditos"'
+                )
+
+            # 4. Reservar y descontar en transacciones por bloques
+            booked, conflicts = book_reservations(
+                venue_id, customer_dni, court_type, free, cost, free_courts
+            )
+            conflicts = sorted(taken.union(conflicts))
+            booked_dates = {reservation['reservation_date'] for reservation in booked}
+            unpaid = [d for d, _ in free if d not in booked_dates and (d, time) not in conflicts]
+
+            skipped_message = ''
+            if conflicts:
+                skipped_message += '\n⚠️ Ocupadas (no reservadas):\n'
+                skipped_message += ''.join(f'- {format_date(d)}\n' for d, _ in conflicts)
+
+            if unpaid:
+                skipped_message += '\n⚠️ Sin créditos suficientes (no reservadas):\n'
+                skipped_message += ''.join(f'- {format_date(d)}\n' for d in unpaid)
+
+            if not booked:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ No pudimos reservar ninguna fecha de los {weekday} a las {time}.\n'
+                    f'{skipped_message}\n'
+                    f'Saldo actual: {get_credits(venue_id, customer_dni)} créditos'
+                    + ('\n\nCarga más: "quiero cargar créditos"' if unpaid else '')
+                )
+
+            # 5. Confirmar en un solo mensaje
+            booked_cost = cost * len(booked)
+            message = (
+                f'✅ ¡Reservas confirmadas: {len(booked)} de {len(occurrences)}!\n\n'
+                f'🏟️ Cancha: {court_type.capitalize()}\n'
+                f'📅 Todos los {weekday} a las {time}\n\n'
+                f'📋 Reservadas:\n'
+            )
+            message += ''.join(
+                f'- {format_date(reservation["reservation_date"])} cancha {reservation["court_number"]} '
+                f'({reservation["reservation_id"]})\n'
+                for reservation in booked
+            )
+            message += skipped_message
+
+            message += (
+                f'\n💰 Costo total: {booked_cost} créditos\n'
+                f'Nuevo saldo: {get_credits(venue_id, customer_dni)} créditos\n\n'
+                f'Llega 10 minutos antes. ¡Disfruta!'
+            )
+
+            return close_intent(event, 'Fulfilled', message)
+
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            return close_intent(
+                event,
+                'Failed',
+                'Error procesando las reservas. Intenta de nuevo.'
+            )
@@ -2,55 +2,19 @@
 Handler para ReserveCourtIntent
 """
 
-import os
-import boto3
-import uuid
 from utils import (
     get_slot_value, 
     close_intent, 
-    get_current_timestamp_ba,
     validate_reservation_time,
     format_date,
     get_current_time_ba,
     elicit_slot,
     delegate
 )
-
-dynamodb = boto3.resource('dynamodb')
-customers_table = dynamodb.Table(os.environ['CUSTOMERS_TABLE'])
-reservations_table = dynamodb.Table(os.environ['RESERVATIONS_TABLE'])
-
-# Costos de canchas (en créditos)
-COURT_COSTS = {
-    'futbol': 50,
-    'fútbol': 50,
-    'voley': 30,
-    'vóley': 30,
-    'voleibol': 30
-}
-
-
-def extract_court_type(text):
-    """
-    Extrae el tipo de cancha del mensaje del usuario
-    """
-    if not text:
-        return None
-    
-    text_lower = text.lower()
-    
-    # Buscar fútbol
-    if 'futbol' in text_lower or 'fútbol' in text_lower:
-        print(f"✅ Detectado: futbol en '{text}'")
-        return 'futbol'
-    
-    # Buscar voley
-    if 'voley' in text_lower or 'vóley' in text_lower or 'voleibol' in text_lower:
-        print(f"✅ Detectado: voley en '{text}'")
-        return 'voley'
-    
-    print(f"❌ No se detectó tipo de cancha en: '{text}'")
-    return None
+from venues import resolve_venue_from_lex
+from customers import get_customer
+from bookings import book_reservations, get_credits
+from courts import COURT_COSTS, extract_court_type, normalize_reservation_time
 
 
 def set_slot(slots, slot_name, value):
@@ -74,6 +38,7 @@ def handle_reserve_court(event):
     invocation_source = event['invocationSource']
     slots = event['sessionState']['intent']['slots']
     session_attributes = event.get('sessionState', {}).get('sessionAttributes', {})
+    venue_id = resolve_venue_from_lex(event)
     
     # Extraer valores de los slots
     customer_dni = get_slot_value(slots, 'sl_customer_dni')
@@ -84,7 +49,7 @@ def handle_reserve_court(event):
     
     print(f"🔍 invocationSource: {invocation_source}")
     print(f"📋 Session Attributes: {session_attributes}")
-    print(f"📋 Slots - DNI: {customer_dni}, Cancha: {court_type}, Fecha: {date}, Hora: {time}")
+    print(f"📋 Slots - Sede: {venue_id}, DNI: {customer_dni}, Cancha: {court_type}, Fecha: {date}, Hora: {time}")
     
     # ==========================================
     # PASO 0: Pre-llenar tipo de cancha si no existe
@@ -119,7 +84,39 @@ def handle_reserve_court(event):
                 'Entendido, reserva cancelada. ¿En qué más puedo ayudarte?'
             )
         
-        # Validación 2: Fecha/hora en el pasado
+        # Validación 2: Tipo de cancha (se guarda el nombre canónico)
+        if court_type:
+            canonical_court = extract_court_type(court_type)
+            if canonical_court is None:
+                print(f"❌ Tipo de cancha desconocido: {court_type}")
+                slots['slt_court_types'] = None
+                return elicit_slot(
+                    event,
+                    'slt_court_types',
+                    f'❌ No tenemos canchas de {court_type}.\n'
+                    f'¿Qué cancha quieres reservar? Fútbol o vóley'
+                )
+            if canonical_court != court_type:
+                set_slot(slots, 'slt_court_types', canonical_court)
+                court_type = canonical_court
+        
+        # Validación 3: Turnos de hora completa
+        if time:
+            normalized_time = normalize_reservation_time(time)
+            if normalized_time is None:
+                print(f"❌ Hora fuera de turno: {time}")
+                slots['sl_time'] = None
+                return elicit_slot(
+                    event,
+                    'sl_time',
+                    f'❌ Las canchas se reservan por hora completa y {time} no es un turno válido.\n'
+                    f'¿A qué hora quieres reservar? Ejemplo: 20:00'
+                )
+            if normalized_time != time:
+                set_slot(slots, 'sl_time', normalized_time)
+                time = normalized_time
+        
+        # Validación 4: Fecha/hora en el pasado
         if date and time:
             if not validate_reservation_time(date, time):
                 print("❌ Fecha/hora en el pasado")
@@ -143,13 +140,28 @@ def handle_reserve_court(event):
     if invocation_source == 'FulfillmentCodeHook':
         print("✅ Creando reserva...")
         
-        if court_type:
-            court_type = court_type.lower()
+        # El costo y el bloqueo de horario usan el tipo canónico
+        court_type = extract_court_type(court_type)
+        if court_type is None:
+            return close_intent(
+                event,
+                'Failed',
+                'No reconocimos el tipo de cancha. Intenta de nuevo con fútbol o vóley.'
+            )
+        
+        # El bloqueo de horario necesita la hora del turno exacta
+        time = normalize_reservation_time(time)
+        if time is None:
+            return close_intent(
+                event,
+                'Failed',
+                'Las canchas se reservan por hora completa. Intenta de nuevo con un horario como 20:00.'
+            )
         
         try:
             # 1. Verificar cliente existe
-            response = customers_table.get_item(Key={'customer_dni': customer_dni})
-            if 'Item' not in response:
+            customer = get_customer(venue_id, customer_dni)
+            if customer is None:
                 return close_intent(
                     event,
                     'Fulfilled',
@@ -157,11 +169,10 @@ def handle_reserve_court(event):
                     f'Primero carga créditos: "quiero cargar créditos"'
                 )
             
-            customer = response['Item']
             current_credits = int(customer.get('credits', 0))
             
             # 2. Calcular costo
-            cost = COURT_COSTS.get(court_type, 50)
+            cost = COURT_COSTS[court_type]
             
             # 3. Verificar créditos
             if current_credits < cost:
@@ -175,30 +186,36 @@ def handle_reserve_court(event):
                     f'Carga más: "quiero cargar créditos"'
                 )
             
-            # 4. Crear reserva
-            reservation_id = f"RES-{uuid.uuid4().hex[:8].upper()}"
-            
-            reservations_table.put_item(
-                Item={
-                    'reservation_id': reservation_id,
-                    'customer_dni': customer_dni,
-                    'court_type': court_type,
-                    'reservation_date': date,
-                    'reservation_time': time,
-                    'reservation_datetime': f"{date} {time}",
-                    'cost': cost,
-                    'status': 'confirmed',
-                    'created_at': get_current_timestamp_ba()
-                }
+            # 4. Crear reserva y descontar créditos (bloqueando la primera cancha libre)
+            booked, conflicts = book_reservations(
+                venue_id,
+                customer_dni,
+                court_type,
+                [(date, time)],
+                cost
             )
             
-            # 5. Descontar créditos
-            new_credits = current_credits - cost
-            customers_table.update_item(
-                Key={'customer_dni': customer_dni},
-                UpdateExpression='SET credits = :credits',
-                ExpressionAttributeValues={':credits': new_credits}
-            )
+            if conflicts:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ No quedan canchas de {court_type} libres el '
+                    f'{format_date(date)} a las {time}.\n'
+                    f'Por favor elige otro horario.'
+                )
+            
+            if not booked:
+                return close_intent(
+                    event,
+                    'Fulfilled',
+                    f'❌ Créditos insuficientes.\n'
+                    f'Carga más: "quiero cargar créditos"'
+                )
+            
+            # 5. Nuevo saldo (lectura posterior: puede haber otras operaciones)
+            reservation_id = booked[0]['reservation_id']
+            court_number = booked[0]['court_number']
+            new_credits = get_credits(venue_id, customer_dni)
             
             # 6. Confirmar
             return close_intent(
@@ -206,7 +223,7 @@ def handle_reserve_court(event):
                 'Fulfilled',
                 f'✅ ¡Reserva confirmada!\n\n'
                 f'📋 Código: {reservation_id}\n'
-                f'🏟️ Cancha: {court_type.capitalize()}\n'
+                f'🏟️ Cancha: {court_type.capitalize()} {court_number}\n'
                 f'📅 Fecha: {format_date(date)}\n'
                 f'🕐 Hora: {time}\n'
                 f'💰 Costo: {cost} créditos\n\n'
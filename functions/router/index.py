@@ -6,9 +6,13 @@ Lex invoca este archivo
 import json
 from handlers.load_credits import handle_load_credits
 from handlers.reserve_court import handle_reserve_court
-from utils import close_intent
+from handlers.recurring_reservation import handle_recurring_reservation
+from utils import close_intent, get_slot_value
+from rate_limiter import is_throttled, THROTTLED_MESSAGE
+from profiling import profile_handler
 
 
+@profile_handler
 def handler(event, context):
     """
     Handler principal - Enruta a los sub-handlers
@@ -19,11 +23,21 @@ def handler(event, context):
     try:
         intent_name = event['sessionState']['intent']['name']
         
+        # Rate limit por DNI y por contacto, antes de tocar las tablas
+        slots = event['sessionState']['intent'].get('slots') or {}
+        customer_dni = get_slot_value(slots, 'sl_customer_dni')
+        contact_id = event.get('sessionId')
+        
+        if is_throttled(customer_dni, contact_id):
+            return close_intent(event, 'Failed', THROTTLED_MESSAGE)
+        
         # Rutear según el intent
         if intent_name == 'LoadCreditsIntent':
             return handle_load_credits(event)
         elif intent_name == 'ReserveCourtIntent':
             return handle_reserve_court(event)
+        elif intent_name == 'RecurringReservationIntent':
+            return handle_recurring_reservation(event)
         else:
             return close_intent(
                 event,
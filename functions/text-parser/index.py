@@ -5,8 +5,10 @@ Parsea el summary de Amazon Q para mostrarlo al agente
 """
 
 import re
+from profiling import profile_handler
 
 
+@profile_handler
 def handler(event, context):
     """
     Parsea texto con tags XML de Amazon Q
@@ -0,0 +1,105 @@
+"""
+Canchas: tipos, costos, cantidad por sede y turnos
+Compartido entre Lambdas y scripts de migración
+"""
+
+import os
+import json
+from datetime import datetime
+
+# Costos de canchas (en créditos), por tipo canónico
+COURT_COSTS = {
+    'futbol': 50,
+    'voley': 30
+}
+
+# Variantes que escriben los clientes -> tipo canónico
+COURT_ALIASES = {
+    'futbol': ['futbol', 'fútbol'],
+    'voley': ['voley', 'vóley', 'voleibol']
+}
+
+
+def _load_court_counts():
+    """
+    Lee COURT_COUNTS: JSON {"sede": {"tipo": cantidad}}
+
+    Un valor inválido no debe romper las Lambdas al importar: se avisa y
+    se usa una cancha por tipo en todas las sedes.
+    """
+    raw = os.environ.get('COURT_COUNTS') or '{}'
+    try:
+        parsed = json.loads(raw)
+        return {
+            venue_id: {court_type: int(count) for court_type, count in courts.items()}
+            for venue_id, courts in parsed.items()
+        }
+    except (ValueError, TypeError, AttributeError):
+        print(f"⚠️ COURT_COUNTS inválido ({raw!r}), se usa una cancha por tipo")
+        return {}
+
+
+# Canchas por sede y tipo; lo que no está configurado tiene una cancha
+COURT_COUNTS = _load_court_counts()
+
+
+def extract_court_type(text):
+    """
+    Extrae el tipo de cancha canónico de un texto
+
+    Sirve tanto para el mensaje del usuario como para el valor del slot,
+    así "fútbol" y "futbol" se cobran, bloquean y guardan igual.
+
+    Ejemplos:
+    - "quiero reservar una cancha de fútbol" -> "futbol"
+    - "Vóley" -> "voley"
+    - "tenis" -> None
+    """
+    if not text:
+        return None
+
+    text_lower = text.lower()
+
+    for court_type, aliases in COURT_ALIASES.items():
+        if any(alias in text_lower for alias in aliases):
+            print(f"✅ Detectado: {court_type} en '{text}'")
+            return court_type
+
+    print(f"❌ No se detectó tipo de cancha en: '{text}'")
+    return None
+
+
+def court_count(venue_id, court_type):
+    """Cantidad de canchas de un tipo en la sede (mínimo 1)"""
+    return max(1, COURT_COUNTS.get(venue_id, {}).get(court_type, 1))
+
+
+def court_numbers(venue_id, court_type):
+    """Números de cancha de un tipo en la sede, en orden de asignación"""
+    return list(range(1, court_count(venue_id, court_type) + 1))
+
+
+def normalize_reservation_time(time_str):
+    """
+    Normaliza la hora al turno de reserva (horas completas)
+
+    Las canchas se reservan por turnos de una hora que empiezan en punto;
+    el bloqueo de horario usa esta hora exacta como clave.
+
+    Ejemplos:
+    - "8:00" -> "08:00"
+    - "20:00" -> "20:00"
+    - "20:30" -> None
+
+    Returns:
+        str: Hora en formato HH:00, o None si no es una hora completa
+    """
+    try:
+        parsed = datetime.strptime(time_str.strip(), '%H:%M')
+    except (AttributeError, ValueError):
+        return None
+
+    if parsed.minute != 0:
+        return None
+
+    return parsed.strftime('%H:%M')
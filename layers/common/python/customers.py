@@ -0,0 +1,61 @@
+"""
+Lectura de clientes por sede con fallback a la tabla single-venue
+Evita que los clientes existentes "desaparezcan" durante la migración
+"""
+
+import os
+import boto3
+from botocore.exceptions import ClientError
+from venues import DEFAULT_VENUE_ID, customer_key, legacy_customer_to_venue
+
+# Tabla del esquema anterior (clave customer_dni); vacío = sin fallback
+LEGACY_CUSTOMERS_TABLE = os.environ.get('LEGACY_CUSTOMERS_TABLE')
+
+dynamodb = boto3.resource('dynamodb')
+customers_table = dynamodb.Table(os.environ['CUSTOMERS_TABLE'])
+legacy_customers_table = (
+    dynamodb.Table(LEGACY_CUSTOMERS_TABLE) if LEGACY_CUSTOMERS_TABLE else None
+)
+
+
+def get_customer(venue_id, customer_dni, migrate=True):
+    """
+    Busca un cliente en la tabla por sede
+
+    Si no existe y la sede es la de los datos single-venue (DEFAULT_VENUE_ID),
+    lo busca en la tabla anterior. Con migrate=True lo copia a la tabla nueva
+    solo si todavía no existe, así nunca pisa un saldo más reciente.
+
+    Returns:
+        dict: Item del cliente, o None si no existe
+    """
+    key = customer_key(venue_id, customer_dni)
+    response = customers_table.get_item(Key={'customer_key': key})
+    if 'Item' in response:
+        return response['Item']
+
+    if legacy_customers_table is None or venue_id != DEFAULT_VENUE_ID:
+        return None
+
+    legacy = legacy_customers_table.get_item(Key={'customer_dni': customer_dni})
+    if 'Item' not in legacy:
+        return None
+
+    migrated = legacy_customer_to_venue(legacy['Item'], venue_id)
+    if not migrate:
+        return migrated
+
+    try:
+        customers_table.put_item(
+            Item=migrated,
+            ConditionExpression='attribute_not_exists(customer_key)'
+        )
+        print(f"📦 Cliente migrado desde {LEGACY_CUSTOMERS_TABLE}: {key}")
+        return migrated
+
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # Otra invocación (o el script) lo migró primero: usar ese valor
+        response = customers_table.get_item(Key={'customer_key': key}, ConsistentRead=True)
+        return response.get('Item')
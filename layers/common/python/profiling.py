@@ -0,0 +1,127 @@
+"""
+Profiling opcional de handlers (cProfile + tracemalloc)
+Se activa con PROFILING_SAMPLE_RATE; desactivado no agrega ningún costo
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import resource
+import time
+import tracemalloc
+from functools import wraps
+
+
+def _env_number(name, default, cast):
+    """
+    Lee una variable numérica sin romper la importación del handler
+
+    Un valor inválido desactiva la opción en lugar de fallar cada invocación
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"⚠️ {name} inválido ({value!r}), usando {default}")
+        return default
+
+
+# Fracción de invocaciones a perfilar: 0 = nunca, 1 = siempre
+PROFILING_SAMPLE_RATE = _env_number('PROFILING_SAMPLE_RATE', 0.0, float)
+if not 0 <= PROFILING_SAMPLE_RATE <= 1:
+    print(f"⚠️ PROFILING_SAMPLE_RATE fuera de rango ({PROFILING_SAMPLE_RATE}), usando 0")
+    PROFILING_SAMPLE_RATE = 0.0
+
+# Cantidad de funciones y líneas de asignación en el resumen
+PROFILING_TOP_N = max(1, _env_number('PROFILING_TOP_N', 15, int))
+
+# Excluye del snapshot las asignaciones del propio profiling
+IGNORED_FRAMES = [
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__)
+]
+
+
+def profile_handler(handler):
+    """
+    Decorador para el handler de una Lambda
+
+    Si el profiling está desactivado devuelve el handler sin envolver.
+    Si está activo, perfila una muestra de invocaciones y loguea un
+    resumen con funciones, asignaciones y memoria pico.
+    """
+    if PROFILING_SAMPLE_RATE <= 0:
+        return handler
+
+    @wraps(handler)
+    def wrapper(event, context):
+        if random.random() >= PROFILING_SAMPLE_RATE:
+            return handler(event, context)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return handler(event, context)
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            name = getattr(context, 'function_name', handler.__module__)
+            print(format_summary(name, profiler, snapshot, elapsed_ms, current, peak))
+
+    return wrapper
+
+
+def format_summary(name, profiler, snapshot, elapsed_ms, current, peak):
+    """
+    Arma el resumen en un solo bloque para que quede en un único evento de log
+
+    Args:
+        name: Nombre de la función Lambda
+        profiler: cProfile.Profile ya detenido
+        snapshot: tracemalloc.Snapshot de la invocación
+        elapsed_ms: Duración de la invocación en milisegundos
+        current: Memoria Python en uso al final (bytes)
+        peak: Memoria Python pico durante la invocación (bytes)
+    """
+    stats_stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stats_stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILING_TOP_N)
+
+    allocations = [
+        f"  {stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+        f"{stat.size / 1024:.1f} KiB en {stat.count} bloques"
+        for stat in snapshot.filter_traces(IGNORED_FRAMES).statistics('lineno')[:PROFILING_TOP_N]
+    ]
+
+    # En Linux ru_maxrss viene en KB
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return '\n'.join([
+        f"📊 PROFILE {name}",
+        f"⏱️ Duración: {elapsed_ms:.1f} ms",
+        f"🧠 Memoria Python: actual {current / 1024:.1f} KiB, pico {peak / 1024:.1f} KiB",
+        f"📦 RSS máximo del proceso: {max_rss_mb:.1f} MiB",
+        f"🔝 Top {PROFILING_TOP_N} funciones (tiempo acumulado):",
+        stats_stream.getvalue().strip(),
+        f"🔝 Top {PROFILING_TOP_N} asignaciones:",
+        *allocations
+    ])
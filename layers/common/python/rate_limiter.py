@@ -0,0 +1,195 @@
+"""
+Rate limiting compartido entre Lambdas
+Token bucket sobre DynamoDB (GCRA) con tokens prestados por contenedor
+
+Cada escritura condicional toma varios tokens del bucket de una vez
+(RATE_LIMIT_LEASE_SIZE). El contenedor los gasta localmente sin volver a
+escribir mientras le queden, así una conversación de varios turnos que cae
+en el mismo contenedor paga una escritura cada N solicitudes.
+"""
+
+import os
+import time
+from decimal import Decimal
+import boto3
+from botocore.exceptions import ClientError
+
+RATE_LIMIT_TABLE = os.environ.get('RATE_LIMIT_TABLE')
+
+# Tamaño del bucket (ráfaga máxima) y segundos para reponer un token
+RATE_LIMIT_CAPACITY = int(os.environ.get('RATE_LIMIT_CAPACITY', '20'))
+RATE_LIMIT_REFILL_SECONDS = float(os.environ.get('RATE_LIMIT_REFILL_SECONDS', '3'))
+
+# Tokens que se toman del bucket por escritura
+RATE_LIMIT_LEASE_SIZE = max(1, min(
+    int(os.environ.get('RATE_LIMIT_LEASE_SIZE', '5')),
+    RATE_LIMIT_CAPACITY
+))
+
+# Escrituras condicionales por solicitud antes de dejar pasar (fail open)
+MAX_UPDATE_ATTEMPTS = 3
+
+# Máximo de claves recordadas por contenedor antes de limpiar
+LOCAL_CACHE_MAX_KEYS = 1000
+
+THROTTLED_MESSAGE = (
+    'Recibimos muchas solicitudes seguidas. '
+    'Por favor espera unos segundos e intenta de nuevo.'
+)
+
+dynamodb = boto3.resource('dynamodb')
+rate_limit_table = dynamodb.Table(RATE_LIMIT_TABLE) if RATE_LIMIT_TABLE else None
+
+# Último TAT (theoretical arrival time) conocido por clave, como Decimal
+# para poder usarlo tal cual en la condición de la próxima escritura
+_local_tat = {}
+
+# Tokens prestados por clave: {'tokens': n, 'expires': epoch}
+_local_leases = {}
+
+
+def _to_decimal(value):
+    """DynamoDB no acepta float, solo Decimal"""
+    return Decimal(str(round(value, 3)))
+
+
+def _lease(limit_key, known_tat, now, tokens):
+    """
+    Toma tokens del bucket con una escritura condicional (compare-and-set)
+
+    Args:
+        known_tat: TAT guardado según este contenedor (Decimal o None)
+        tokens: Cantidad de tokens a tomar
+
+    Returns:
+        tuple: (aplicado, tat) donde tat es el valor nuevo si se aplicó,
+               el valor guardado si falló la condición, o None si no existe
+    """
+    base = now if known_tat is None or float(known_tat) <= now else float(known_tat)
+    new_tat = _to_decimal(base + tokens * RATE_LIMIT_REFILL_SECONDS)
+    values = {
+        ':new_tat': new_tat,
+        ':expires_at': int(float(new_tat) + RATE_LIMIT_REFILL_SECONDS)
+    }
+
+    if base == now:
+        # Bucket lleno (o inexistente)
+        condition = 'attribute_not_exists(tat) OR tat <= :now'
+        values[':now'] = _to_decimal(now)
+    else:
+        condition = 'tat = :old_tat'
+        values[':old_tat'] = known_tat
+
+    try:
+        rate_limit_table.update_item(
+            Key={'limit_key': limit_key},
+            UpdateExpression='SET tat = :new_tat, expires_at = :expires_at',
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values,
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True, new_tat
+
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # El item viene en formato low-level: {'tat': {'N': '...'}}
+        old_item = e.response.get('Item', {})
+        if 'tat' in old_item:
+            return False, Decimal(old_item['tat']['N'])
+        return False, None
+
+
+def _available_tokens(tat, now):
+    """Tokens que quedan en el bucket según el TAT"""
+    if tat is None or float(tat) <= now:
+        return RATE_LIMIT_CAPACITY
+    free_seconds = now + RATE_LIMIT_CAPACITY * RATE_LIMIT_REFILL_SECONDS - float(tat)
+    return int(free_seconds // RATE_LIMIT_REFILL_SECONDS)
+
+
+def _remember(limit_key, tat, now):
+    """Guarda el TAT en memoria, limpiando claves vencidas si hay demasiadas"""
+    if len(_local_tat) >= LOCAL_CACHE_MAX_KEYS:
+        for key in [k for k, v in _local_tat.items() if float(v) <= now]:
+            del _local_tat[key]
+            _local_leases.pop(key, None)
+    _local_tat[limit_key] = tat
+
+
+def allow_request(limit_key):
+    """
+    Consume un token del bucket de la clave
+
+    Primero usa los tokens prestados al contenedor; solo escribe en
+    DynamoDB cuando se acabaron o vencieron.
+
+    Args:
+        limit_key: Clave del bucket (ej: 'dni#12345678')
+
+    Returns:
+        bool: True si la solicitud puede seguir, False si está limitada
+    """
+    if rate_limit_table is None:
+        return True
+
+    now = time.time()
+
+    # Tokens prestados: sin escritura. Vencen en el tiempo que el bucket
+    # tardaría en reponerlos, para que no se acumulen y permitan ráfagas
+    lease = _local_leases.get(limit_key)
+    if lease and lease['tokens'] > 0 and now < lease['expires']:
+        lease['tokens'] -= 1
+        return True
+
+    known_tat = _local_tat.get(limit_key)
+
+    try:
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            # El TAT conocido es una cota inferior del guardado: si según él
+            # no quedan tokens, seguro que no quedan (y no escribimos)
+            available = _available_tokens(known_tat, now)
+            if available < 1:
+                print(f"⛔ Rate limit para {limit_key}")
+                return False
+
+            tokens = min(RATE_LIMIT_LEASE_SIZE, available)
+            applied, tat = _lease(limit_key, known_tat, now, tokens)
+
+            if tat is not None:
+                _remember(limit_key, tat, now)
+
+            if applied:
+                _local_leases[limit_key] = {
+                    'tokens': tokens - 1,
+                    'expires': now + tokens * RATE_LIMIT_REFILL_SECONDS
+                }
+                return True
+
+            # Otro contenedor escribió primero: reintentar con su valor
+            known_tat = tat
+
+    except Exception as e:
+        # Si el limitador falla no bloqueamos al cliente
+        print(f"⚠️ Error en rate limit para {limit_key}: {str(e)}")
+        return True
+
+    # Quedaban tokens pero hubo demasiada concurrencia: no bloquear
+    print(f"⚠️ Rate limit sin resolver para {limit_key} (concurrencia), se deja pasar")
+    return True
+
+
+def is_throttled(customer_dni=None, contact_id=None):
+    """
+    Aplica el límite por DNI y por contacto de Connect
+
+    Returns:
+        bool: True si alguna de las claves superó el límite
+    """
+    limit_keys = []
+    if customer_dni:
+        limit_keys.append(f"dni#{customer_dni}")
+    if contact_id:
+        limit_keys.append(f"contact#{contact_id}")
+
+    return not all(allow_request(limit_key) for limit_key in limit_keys)
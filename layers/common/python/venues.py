@@ -0,0 +1,129 @@
+"""
+Sedes (venues) y claves particionadas por sede
+Compartido entre Lambdas y scripts de migración
+"""
+
+import os
+import re
+
+# Sede usada cuando el contacto no trae el atributo venue_id
+DEFAULT_VENUE_ID = os.environ.get('DEFAULT_VENUE_ID', 'central')
+
+# Nombre del atributo de contacto de Connect (y de sesión de Lex)
+VENUE_ATTRIBUTE = 'venue_id'
+
+KEY_SEPARATOR = '#'
+
+
+def normalize_venue_id(venue_id):
+    """
+    Normaliza el identificador de sede
+
+    Solo conserva minúsculas, dígitos y guiones para que nunca
+    pueda contener el separador de claves.
+
+    Ejemplos:
+    - "Palermo Norte" -> "palermo-norte"
+    - "" / None -> DEFAULT_VENUE_ID
+    """
+    if not venue_id:
+        return DEFAULT_VENUE_ID
+
+    normalized = re.sub(r'\s+', '-', str(venue_id).strip().lower())
+    normalized = re.sub(r'[^a-z0-9-]', '', normalized)
+    return normalized or DEFAULT_VENUE_ID
+
+
+def resolve_venue_from_lex(event):
+    """
+    Obtiene la sede de un evento de Lex
+
+    Connect no pasa los atributos de contacto a Lex por sí solo: el bloque
+    "Get customer input" debe copiar venue_id como session attribute.
+    """
+    session_attributes = event.get('sessionState', {}).get('sessionAttributes') or {}
+    venue_id = session_attributes.get(VENUE_ATTRIBUTE)
+
+    if not venue_id:
+        # Casi siempre es el flujo de Connect sin el session attribute
+        print(f"⚠️ Evento de Lex sin '{VENUE_ATTRIBUTE}' en sessionAttributes, "
+              f"se usa la sede por defecto: {DEFAULT_VENUE_ID}")
+
+    return normalize_venue_id(venue_id)
+
+
+def resolve_venue_from_connect(event):
+    """
+    Obtiene la sede de un evento de Connect
+
+    Primero los parámetros de la invocación, después los atributos del contacto
+    """
+    details = event.get('Details', {})
+    parameters = details.get('Parameters') or {}
+    attributes = details.get('ContactData', {}).get('Attributes') or {}
+    return normalize_venue_id(
+        parameters.get(VENUE_ATTRIBUTE) or attributes.get(VENUE_ATTRIBUTE)
+    )
+
+
+def customer_key(venue_id, customer_dni):
+    """Clave primaria de sports-customers: 'sede#dni'"""
+    return f"{venue_id}{KEY_SEPARATOR}{customer_dni}"
+
+
+def legacy_customer_to_venue(item, venue_id):
+    """Convierte un cliente del esquema single-venue (clave customer_dni)"""
+    migrated = dict(item)
+    migrated['venue_id'] = venue_id
+    migrated['customer_key'] = customer_key(venue_id, item['customer_dni'])
+    return migrated
+
+
+def venue_day_key(venue_id, date):
+    """Clave de partición de VenueDayIndex: 'sede#YYYY-MM-DD'"""
+    return f"{venue_id}{KEY_SEPARATOR}{date}"
+
+
+def reservation_slot_key(time, court_type, court_number=None):
+    """
+    Clave de ordenamiento de VenueDayIndex: 'HH:MM#tipo#cancha'
+
+    Sin número de cancha (reservas migradas sin bloqueo): 'HH:MM#tipo'
+    """
+    parts = [time, court_type]
+    if court_number is not None:
+        parts.append(str(court_number))
+    return KEY_SEPARATOR.join(parts)
+
+
+def slot_lock_key(venue_id, date, time, court_type, court_number):
+    """
+    reservation_id del bloqueo de un horario:
+    'SLOT#sede#YYYY-MM-DD#HH:MM#tipo#cancha'
+
+    Clave determinística para detectar conflictos con BatchGetItem.
+    El tipo llega canónico (courts.extract_court_type) y la hora
+    normalizada a HH:00, así dos reservas de la misma cancha y turno
+    siempre generan la misma clave.
+    """
+    return KEY_SEPARATOR.join(
+        ['SLOT', venue_id, date, time, court_type, str(court_number)]
+    )
+
+
+def build_slot_lock(reservation):
+    """Arma el bloqueo del horario de una reserva (con court_number)"""
+    return {
+        'reservation_id': slot_lock_key(
+            reservation['venue_id'],
+            reservation['reservation_date'],
+            reservation['reservation_time'],
+            reservation['court_type'],
+            reservation['court_number']
+        ),
+        'item_type': 'slot_lock',
+        'venue_id': reservation['venue_id'],
+        'court_number': reservation['court_number'],
+        'locked_by': reservation['reservation_id'],
+        'created_at': reservation['created_at']
+    }
@@ -0,0 +1,312 @@
+"""
+Migración de datos single-venue a tablas particionadas por sede
+
+Copia sports-customers y sports-reservations (esquema original, clave
+customer_dni) a sports-customers-v2 y sports-reservations-v2 asignando
+todos los registros a una sede, y crea el bloqueo de horario de cada
+reserva confirmada en la primera cancha libre de su tipo.
+
+Las reservas se migran con el mismo tipo de cancha canónico y la misma
+hora de turno que usa el router. Las que no caen en una hora completa o
+tienen un tipo de cancha desconocido se copian sin bloqueo, y las que no
+encuentran cancha libre (dos reservas del mismo turno) se copian sin
+bloqueo y se informan como colisiones para resolverlas a mano.
+
+Cada escritura es condicional (attribute_not_exists): si el item ya existe
+en la tabla nueva, porque las Lambdas lo migraron al usarlo o porque se
+creó después del deploy, se conserva y no se pisa. Por eso se puede correr
+con tráfico activo y volver a correr sin perder saldos ni bloqueos.
+
+La cantidad de canchas por sede se lee de COURT_COUNTS, igual que en las
+Lambdas (exportar el mismo valor del parámetro CourtCounts).
+
+Uso:
+    export COURT_COUNTS='{"central": {"futbol": 2}}'
+    python scripts/migrate_to_venues.py --venue-id central --dry-run
+    python scripts/migrate_to_venues.py --venue-id central
+"""
+
+import argparse
+import os
+import sys
+import boto3
+from botocore.exceptions import ClientError
+
+# Reutiliza las claves del layer compartido de las Lambdas
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from venues import (  # noqa: E402
+    normalize_venue_id,
+    customer_key,
+    legacy_customer_to_venue,
+    venue_day_key,
+    reservation_slot_key,
+    build_slot_lock
+)
+from courts import (  # noqa: E402
+    extract_court_type,
+    court_numbers,
+    normalize_reservation_time
+)
+
+
+def scan_all(table):
+    """Recorre la tabla completa paginando el Scan"""
+    kwargs = {}
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get('Items', [])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def migrate_customer(item, venue_id):
+    """Agrega la sede y la clave 'sede#dni' a un cliente"""
+    return [legacy_customer_to_venue(item, venue_id)]
+
+
+def migrate_reservation(item, venue_id):
+    """
+    Agrega la sede y las claves de CustomerIndex y VenueDayIndex a una reserva
+
+    Returns:
+        tuple: (reserva migrada, True si se puede bloquear su horario).
+               Sin bloqueo cuando la hora o el tipo de cancha no son válidos.
+    """
+    migrated = dict(item)
+    migrated['venue_id'] = venue_id
+    migrated['customer_key'] = customer_key(venue_id, item['customer_dni'])
+    migrated['venue_day'] = venue_day_key(venue_id, item['reservation_date'])
+    migrated['reservation_slot'] = reservation_slot_key(
+        item['reservation_time'],
+        item['court_type']
+    )
+
+    court_type = extract_court_type(item['court_type'])
+    time = normalize_reservation_time(item['reservation_time'])
+    if court_type is None or time is None:
+        return migrated, False
+
+    # Mismas claves que genera el router
+    migrated['court_type'] = court_type
+    migrated['reservation_time'] = time
+    migrated['reservation_datetime'] = f"{item['reservation_date']} {time}"
+    migrated['reservation_slot'] = reservation_slot_key(time, court_type)
+    return migrated, True
+
+
+def with_court(reservation, court_number):
+    """Copia de la reserva asignada a una cancha"""
+    assigned = dict(reservation)
+    assigned['court_number'] = court_number
+    assigned['reservation_slot'] = reservation_slot_key(
+        reservation['reservation_time'],
+        reservation['court_type'],
+        court_number
+    )
+    return assigned
+
+
+def claim_court(target, reservation, venue_id, claimed, dry_run):
+    """
+    Bloquea la primera cancha libre del turno para la reserva
+
+    Una cancha bloqueada por la misma reserva (corrida anterior) cuenta
+    como propia, así volver a correr no duplica bloqueos.
+
+    Args:
+        claimed: Dict clave de bloqueo -> reservation_id, usado en dry run
+                 para detectar colisiones sin leer la tabla nueva
+
+    Returns:
+        tuple: (reserva con court_number o None si no hay cancha libre,
+                True si el bloqueo se escribió ahora,
+                reservation_id de las reservas que ocupan las canchas)
+    """
+    holders = []
+    numbers = court_numbers(venue_id, reservation['court_type'])
+
+    # En una corrida anterior la reserva ya pudo quedar asignada a una cancha
+    if not dry_run:
+        existing = target.get_item(
+            Key={'reservation_id': reservation['reservation_id']},
+            ConsistentRead=True
+        ).get('Item', {})
+        previous = existing.get('court_number')
+        if previous is not None and int(previous) in numbers:
+            numbers.remove(int(previous))
+            numbers.insert(0, int(previous))
+
+    for number in numbers:
+        assigned = with_court(reservation, number)
+        lock = build_slot_lock(assigned)
+
+        if dry_run:
+            holder = claimed.setdefault(lock['reservation_id'], reservation['reservation_id'])
+            if holder == reservation['reservation_id']:
+                return assigned, True, holders
+            holders.append(holder)
+            continue
+
+        if put_if_absent(target, lock, 'reservation_id'):
+            return assigned, True, holders
+
+        holder = target.get_item(
+            Key={'reservation_id': lock['reservation_id']},
+            ConsistentRead=True
+        ).get('Item', {}).get('locked_by')
+        if holder == reservation['reservation_id']:
+            return assigned, False, holders
+        holders.append(holder)
+
+    return None, False, holders
+
+
+def put_if_absent(table, item, key_name):
+    """
+    Escribe el item solo si no existe (batch_writer no admite condiciones)
+
+    Returns:
+        bool: True si se escribió, False si ya existía
+    """
+    try:
+        table.put_item(
+            Item=item,
+            ConditionExpression=f'attribute_not_exists({key_name})'
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def copy_table(source, target, transform, venue_id, dry_run):
+    """
+    Copia todos los items de source a target aplicando transform
+
+    transform devuelve la lista de items a escribir por cada item leído.
+
+    Returns:
+        tuple: (items escritos, items omitidos porque ya existían)
+    """
+    written = 0
+    skipped = 0
+
+    if dry_run:
+        for item in scan_all(source):
+            written += len(transform(item, venue_id))
+        return written, skipped
+
+    key_name = target.key_schema[0]['AttributeName']
+    for item in scan_all(source):
+        for migrated in transform(item, venue_id):
+            if put_if_absent(target, migrated, key_name):
+                written += 1
+            else:
+                skipped += 1
+
+    return written, skipped
+
+
+def migrate_reservations(source, target, venue_id, dry_run):
+    """
+    Copia las reservas bloqueando el horario de las confirmadas
+
+    El bloqueo se escribe antes que la reserva: si el script se corta,
+    la próxima corrida encuentra el bloqueo propio y lo reutiliza.
+
+    Returns:
+        dict: Contadores y listas de reservas a revisar
+    """
+    stats = {
+        'written': 0,
+        'skipped': 0,
+        'locks_written': 0,
+        'locks_skipped': 0,
+        'collisions': [],
+        'off_grid': []
+    }
+    claimed = {}
+
+    for item in scan_all(source):
+        reservation, lockable = migrate_reservation(item, venue_id)
+        label = (f"{item['reservation_id']} {item['reservation_date']} "
+                 f"{item['reservation_time']} {item['court_type']}")
+
+        if not lockable:
+            print(f"⚠️ Fuera de turno o cancha desconocida, sin bloqueo: {label} ({item.get('status')})")
+            stats['off_grid'].append(label)
+
+        elif item.get('status') == 'confirmed':
+            assigned, lock_written, holders = claim_court(
+                target, reservation, venue_id, claimed, dry_run
+            )
+            if assigned is None:
+                collision = f"{label} (ocupada por {', '.join(map(str, holders))})"
+                print(f"⚠️ Colisión, sin cancha libre: {collision}")
+                stats['collisions'].append(collision)
+            else:
+                reservation = assigned
+                stats['locks_written' if lock_written else 'locks_skipped'] += 1
+
+        if dry_run or put_if_absent(target, reservation, 'reservation_id'):
+            stats['written'] += 1
+        else:
+            stats['skipped'] += 1
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migra datos single-venue a tablas por sede')
+    parser.add_argument('--venue-id', required=True, help='Sede a la que pertenecen los datos actuales')
+    parser.add_argument('--source-customers', default='sports-customers')
+    parser.add_argument('--source-reservations', default='sports-reservations')
+    parser.add_argument('--target-customers', default='sports-customers-v2')
+    parser.add_argument('--target-reservations', default='sports-reservations-v2')
+    parser.add_argument('--dry-run', action='store_true', help='Solo cuenta y valida, no escribe')
+    args = parser.parse_args()
+
+    venue_id = normalize_venue_id(args.venue_id)
+    dynamodb = boto3.resource('dynamodb')
+
+    print(f"🏟️ Migrando datos a la sede: {venue_id}{' (dry run)' if args.dry_run else ''}")
+
+    written, skipped = copy_table(
+        dynamodb.Table(args.source_customers),
+        dynamodb.Table(args.target_customers),
+        migrate_customer,
+        venue_id,
+        args.dry_run
+    )
+    print(f"✅ Clientes: {written} escritos, {skipped} ya existían "
+          f"({args.source_customers} -> {args.target_customers})")
+
+    stats = migrate_reservations(
+        dynamodb.Table(args.source_reservations),
+        dynamodb.Table(args.target_reservations),
+        venue_id,
+        args.dry_run
+    )
+    print(f"✅ Reservas: {stats['written']} escritas, {stats['skipped']} ya existían "
+          f"({args.source_reservations} -> {args.target_reservations})")
+    print(f"✅ Bloqueos: {stats['locks_written']} escritos, {stats['locks_skipped']} ya existían")
+
+    if stats['off_grid']:
+        print(f"⚠️ {len(stats['off_grid'])} reservas fuera de turno o con cancha desconocida "
+              f"(copiadas sin bloqueo):")
+        for label in stats['off_grid']:
+            print(f"   - {label}")
+
+    if stats['collisions']:
+        print(f"⚠️ {len(stats['collisions'])} colisiones: reservas confirmadas sin cancha libre "
+              f"(copiadas sin bloqueo, resolver a mano):")
+        for label in stats['collisions']:
+            print(f"   - {label}")
+
+
+if __name__ == '__main__':
+    main()